@@ -1,10 +1,14 @@
 import curses
 import logging
-from typing import Type, List, Tuple, Union, cast
+from typing import Type, Deque, Dict, Iterable, List, Optional, Sequence, Tuple, Union, cast
 import os
+import atexit
 from sys import maxsize
 from pathlib import Path
-from copy import deepcopy
+from bisect import bisect_left, bisect_right
+from collections import deque
+from functools import lru_cache
+from itertools import chain
 
 from ccolors import * # pyright: ignore[reportWildcardImportFromLibrary]
 
@@ -14,6 +18,7 @@ DATA_DIR = f"{os.path.expanduser('~')}/.local/share/cinput/"
 # Configure logging
 logging.basicConfig(filename=f'{DATA_DIR}cinput.log', level=logging.DEBUG, filemode='w', format='%(asctime)s - %(levelname)s - %(message)s')
 log = logging.getLogger(__name__)
+_TRACE = False  # per-keystroke logging, off unless debugging the input loop
 
 
 # Configure curses
@@ -24,24 +29,157 @@ init_16_colors()
 BOX_COLOR       = WHITE
 MESSAGE_COLOR   = BRIGHT_YELLOW
 HINT_COLOR      = DIM_WHITE
+REQUIRED_COLOR  = RED | BOLD
+DEFAULT_COLOR   = BRIGHT_YELLOW | BOLD
+SHORTCUT_COLOR  = CYAN
+COMMAND_COLOR   = WHITE
+GHOST_COLOR     = DARK_GREY
 
 # UI dimensions
-SCREEN_HEIGHT, SCREEN_WIDTH = stdscr.getmaxyx()
 COMMAND_WINDOW_HEIGHT   = 3
 Y_PAD                   = COMMAND_WINDOW_HEIGHT - 2
 X_PAD                   = 2
+DEFAULT_LABEL_LEN       = len("Default: ")
+
+_CHR = tuple(chr(code) for code in range(128))   # ASCII keys are looked up instead of chr()'d per keystroke
+
+
+def _common_prefix_len(a: str, b: str) -> int: # bisects on slice compares, which run in C, instead of walking chars
+    lo, hi = 0, min(len(a), len(b))
+    if a[:hi] == b[:hi]: # typing at the end, the whole old text is unchanged
+        return hi
+    while lo < hi: # a[:lo] always matches, a[:hi + 1] never does
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+# directory listings for path completion, reused until the directory's mtime changes
+@lru_cache(maxsize=128)
+def _listdir_cached(dir_str: str, mtime_ns: int) -> Tuple[str, ...]:
+    return tuple(os.path.join(dir_str, name) for name in os.listdir(dir_str))
+
+def _listdir(dir_str: str) -> Tuple[str, ...]:
+    return _listdir_cached(dir_str, os.stat(dir_str).st_mtime_ns)
+
+
+# shortcut letters per commands tuple, shared by every window and bounded so dynamic menus don't pile up
+@lru_cache(maxsize=64)
+def _shortcuts_for(commands: Tuple[str, ...]) -> Tuple[Tuple[str, str], ...]:
+    used_shortcuts, commands_map = set(), []
+    for command in commands:
+        shortcut = (" ⚠ ", "INVALID")
+        for instruction in command: # first letter not already taken
+            if instruction not in used_shortcuts:
+                shortcut = (instruction, command)
+                break
+        commands_map.append(shortcut)
+        used_shortcuts.add(shortcut[0])
+    return tuple(commands_map)
+
+
+# outcomes a key handler can return, _SUBMIT and _CANCEL end the input loop, _NOOP skips the redraw
+_SUBMIT = object()
+_CANCEL = object()
+_NOOP   = object()
+
+
+class _GapBuffer:
+    # text as cells split around a gap at the edit point, so typing at the cursor is O(1) amortized
+    GROW_CHUNK = 64
+
+    def __init__(self, text: str="") -> None:
+        self._buf: List[str] = []
+        self._gap_start: int = 0
+        self._gap_end: int = 0
+        self._text: Optional[str] = ""
+        self.load(text)
+
+    def __len__(self) -> int:
+        return len(self._buf) - (self._gap_end - self._gap_start)
+
+    def __str__(self) -> str:
+        if self._text is None:
+            self._text = "".join(self._buf[:self._gap_start]) + "".join(self._buf[self._gap_end:])
+        return self._text
+
+    def _move_gap(self, pos: int) -> None:
+        if pos < self._gap_start: # shift cells right across the gap
+            n = self._gap_start - pos
+            self._buf[self._gap_end - n:self._gap_end] = self._buf[pos:self._gap_start]
+            self._gap_start, self._gap_end = pos, self._gap_end - n
+        elif pos > self._gap_start: # shift cells left across the gap
+            n = pos - self._gap_start
+            self._buf[self._gap_start:pos] = self._buf[self._gap_end:self._gap_end + n]
+            self._gap_start, self._gap_end = pos, self._gap_end + n
+
+    def _reserve(self, n: int) -> None:
+        if self._gap_end - self._gap_start < n:
+            grow = max(n, len(self._buf), self.GROW_CHUNK)
+            self._buf[self._gap_end:self._gap_end] = [""] * grow
+            self._gap_end += grow
+
+    def load(self, text: str) -> None:
+        if len(text) > len(self._buf):
+            self._buf = list(text) + [""] * self.GROW_CHUNK
+        else: # fits, overwrite the front of the existing cells in place
+            self._buf[:len(text)] = text
+        self._gap_start, self._gap_end = len(text), len(self._buf)
+        self._text = text
+
+    def clear(self) -> None:
+        self._gap_start, self._gap_end = 0, len(self._buf)
+        self._text = ""
+
+    def insert(self, pos: int, char: str) -> None: # clamps pos the way list.insert does
+        pos = min(max(pos + len(self) if pos < 0 else pos, 0), len(self))
+        self._move_gap(pos)
+        self._reserve(1)
+        self._buf[self._gap_start] = char
+        self._gap_start += 1
+        self._text = None
+
+    def pop(self, pos: int) -> str:
+        if pos < 0:
+            pos += len(self)
+        if not 0 <= pos < len(self):
+            raise IndexError("pop index out of range")
+        self._move_gap(pos)
+        char = self._buf[self._gap_end]
+        self._gap_end += 1
+        self._text = None
+        return char
+
+    def extend(self, text: str) -> None:
+        self._move_gap(len(self))
+        self._reserve(len(text))
+        self._buf[self._gap_start:self._gap_start + len(text)] = text
+        self._gap_start += len(text)
+        self._text = None
+
 
 class CommandWindow:
     HELP, INPUT, ADD, DELETE, EDIT, SELECT  =   0,       1,        2,         3,           4,           5,
-    HINT_STRINGS                            = ["Help:", "Input:", "Adding:", "Deleting:", "Changing:", "Selecting:"]
+    HINT_STRINGS                            = ("Help:", "Input:", "Adding:", "Deleting:", "Changing:", "Selecting:")
+    HINT_LENS                               = tuple(len(hint) for hint in HINT_STRINGS)
+    HINT_BYTES                              = tuple(hint.encode() for hint in HINT_STRINGS)   # skips the str conversion in addstr
 
     def __init__(self):
+        self._screen_h, self._screen_w = stdscr.getmaxyx()  # refreshed by _on_resize
         self.h: int = COMMAND_WINDOW_HEIGHT
-        self.w: int = SCREEN_WIDTH
-        self.y: int = SCREEN_HEIGHT - COMMAND_WINDOW_HEIGHT
+        self.w: int = self._screen_w
+        self.y: int = self._screen_h - COMMAND_WINDOW_HEIGHT
         self.x: int = 0
         self.win: curses.window = curses.newwin(self.h, self.w, self.y, self.x)
         self.state: int = self.HELP
+        self._box_key: Optional[tuple] = None   # arguments of the box currently on screen
+        self._box_mlen: int = 0
+        self._select_shortcuts: Optional[Tuple[tuple, List[Tuple[str, str]]]] = None # (choices, numbered shortcuts) from the last make_selection
+        self._history_fds: Dict[str, int] = {}          # append-only descriptors, one per history file
+        self._underscores: str = '_' * self._screen_w  # sliced for input fields instead of rebuilt per draw
 
         curses.curs_set(0)
         curses.noecho()
@@ -50,98 +188,137 @@ class CommandWindow:
 
 
     def _draw_box(self, message: str="", commands: Union[List[str], List[Tuple[str, str]]]=[], default: Union[int, str]="", required: bool=False) -> int:
+        box_key = (self.state, message, tuple(commands), default, required)
+        if box_key == self._box_key: # chrome is unchanged, only wipe what was typed after it
+            if self._box_mlen + 1 < self.w - 1:
+                self.win.addstr(Y_PAD, self._box_mlen + 1, ' ' * (self.w - 2 - self._box_mlen))
+            self.win.touchwin() # the host may have drawn over us since, have doupdate diff every line again
+            self.win.noutrefresh()
+            return self._box_mlen
+
         self.win.erase()
         self.win.attron(BOX_COLOR)
         self.win.box()
         self.win.attroff(BOX_COLOR)
-        self.win.addstr(0, 1, self.HINT_STRINGS[self.state], HINT_COLOR)
+        self.win.addstr(0, 1, self.HINT_BYTES[self.state], HINT_COLOR)
 
         if message:
             message = message.strip()
-            mlen = max(len(message) + 3 + 4, len(self.HINT_STRINGS[self.state]))
-            self.win.addstr(Y_PAD, (1 * X_PAD), f"  {message}    ", BRIGHT_YELLOW)
+            mlen = max(len(message) + 3 + 4, self.HINT_LENS[self.state])
+            self.win.addstr(Y_PAD, (1 * X_PAD), f"  {message}    ", MESSAGE_COLOR)
             if required:
-                self.win.addstr(Y_PAD, (1 * X_PAD) + 2 + len(message), f"*", RED | BOLD)
-            self.win.addch(0, mlen, '┬', WHITE)
-            for bar_index in range(Y_PAD, COMMAND_WINDOW_HEIGHT - 1):
-                self.win.addch(bar_index, mlen, '│', WHITE)
-            self.win.addch(COMMAND_WINDOW_HEIGHT - 1, mlen, '┴', WHITE)
+                self.win.addstr(Y_PAD, (1 * X_PAD) + 2 + len(message), f"*", REQUIRED_COLOR)
+            self.win.addch(0, mlen, '┬', BOX_COLOR)
+            self.win.vline(Y_PAD, mlen, curses.ACS_VLINE, COMMAND_WINDOW_HEIGHT - 1 - Y_PAD, BOX_COLOR)
+            self.win.addch(COMMAND_WINDOW_HEIGHT - 1, mlen, '┴', BOX_COLOR)
         else:
             mlen = (2 * X_PAD) # off border then off edge
 
         if default:
             default_string = str(default).strip()
             self.win.addstr(0, mlen + 1, "Default:")
-            dlen = max(len("Default: "), len(default_string) + 3 + 4 + 2)
-            self.win.addch(0, mlen + dlen, '┬', WHITE)
-            for bar_index in range(Y_PAD, COMMAND_WINDOW_HEIGHT - 1):
-                self.win.addch(bar_index, mlen + dlen, '│', WHITE)
-            self.win.addch(2, mlen + dlen, '┴', WHITE)
+            dlen = max(DEFAULT_LABEL_LEN, len(default_string) + 3 + 4 + 2)
+            self.win.addch(0, mlen + dlen, '┬', BOX_COLOR)
+            self.win.vline(Y_PAD, mlen + dlen, curses.ACS_VLINE, COMMAND_WINDOW_HEIGHT - 1 - Y_PAD, BOX_COLOR)
+            self.win.addch(2, mlen + dlen, '┴', BOX_COLOR)
             if self.state == self.INPUT:
                 default_prompt = f"   \"{default_string}\"  "
             else:
                 default_prompt = f"    {default_string}   "
-            self.win.addstr(1, mlen + 1, default_prompt, BRIGHT_YELLOW | BOLD)
-            mlen += max(len("Default: "), len(default_string) + 3 + 4 + 2)
+            self.win.addstr(1, mlen + 1, default_prompt, DEFAULT_COLOR)
+            mlen += dlen
 
         if commands:
             shortcut_command_map = self.create_shortcuts(commands)
             if message: mlen += 5
-            for mapped_shortcut in shortcut_command_map:
-                self.win.addstr(Y_PAD, mlen, f"{mapped_shortcut[0]}: ", CYAN)
-                self.win.addstr(Y_PAD, (mlen := mlen + 3), f"{mapped_shortcut[1]}", WHITE)
-                mlen += len(mapped_shortcut[1]) + (2 * X_PAD)
-
-        self.win.refresh()
+            gap = ' ' * (2 * X_PAD)
+            # each entry is "k: " then its label at +3, drawn as one line and the shortcuts recolored in place
+            self.win.addstr(Y_PAD, mlen, gap.join(f"{shortcut}: "[:3].ljust(3) + command for shortcut, command in shortcut_command_map), COMMAND_COLOR)
+            for shortcut, command in shortcut_command_map:
+                self.win.chgat(Y_PAD, mlen, min(len(shortcut) + 2, 3), SHORTCUT_COLOR)
+                mlen += 3 + len(command) + (2 * X_PAD)
+
+        self.win.noutrefresh()
+        self._box_key, self._box_mlen = box_key, mlen
         return mlen
 
 
+    def _on_resize(self) -> None: # curses reports a terminal resize as KEY_RESIZE from getch
+        curses.update_lines_cols()
+        self._screen_h, self._screen_w = stdscr.getmaxyx()
+        self.w, self.y = self._screen_w, self._screen_h - COMMAND_WINDOW_HEIGHT
+        self.win.resize(self.h, self.w)
+        self.win.mvwin(self.y, self.x)
+        self._underscores = '_' * self._screen_w
+        box_key, self._box_key = self._box_key, None
+        if box_key: # rebuild the box that was on screen at the new size
+            _, message, commands, default, required = box_key
+            self._draw_box(message, list(commands), default, required)
+
+
+    def invalidate_box(self) -> None: # only needed if something wrote into this window itself, the next draw rebuilds the chrome
+        self._box_key = None
+        self.win.touchwin()
+
+
+    def _history_fd(self, history_file_name: str) -> int: # opened once and kept for the lifetime of the window
+        if history_file_name not in self._history_fds:
+            fd = os.open(history_file_name, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            atexit.register(os.close, fd)
+            self._history_fds[history_file_name] = fd
+        return self._history_fds[history_file_name]
+
+
     def create_shortcuts(self, commands: Union[List[str], List[Tuple[str, str]]]) -> List[Tuple[str, str]]:
         if commands and isinstance(commands[0], tuple):
             return cast(List[Tuple[str, str]], commands) # users can define their own shortcut tuples
 
-        used_shortcuts, commands_map = [], []
-        for command in commands:
-            shortcut = next(((instruction, command) for instruction in command if instruction not in used_shortcuts), (" ⚠ ", "INVALID"))
-            commands_map.append(shortcut)
-            used_shortcuts.append(shortcut[0])
-        return commands_map
+        return list(_shortcuts_for(tuple(cast(List[str], commands)))) # a copy, callers may change it
 
 
     def help(self, commands: Union[List[str], List[Tuple[str, str]]]) -> None:
         self.state = self.HELP
         self._draw_box(message="", commands=commands)
+        curses.doupdate()
 
 
     def make_selection(self, message: str, choices: List[str], default: str="", required: bool=False) -> str:
         self.state = self.SELECT
-        self._draw_box(message=message, commands=[(str(i+1), str(choice)) for i, choice in enumerate(choices)], default=default)
-
+        choices_key = tuple(choices)
+        if self._select_shortcuts is None or self._select_shortcuts[0] != choices_key:
+            self._select_shortcuts = (choices_key, [(str(i+1), str(choice)) for i, choice in enumerate(choices)])
+        self._draw_box(message=message, commands=self._select_shortcuts[1], default=default)
+        curses.doupdate()
+
+        valid_numbers = range(1, len(choices)+1)
+        try:
+            default_number = int(default)
+        except ValueError: # no usable default, enter does nothing
+            default_number = -1
         selected_number = -1
-        while selected_number not in range(1, len(choices)+1):
-            try:
-                key = self.win.getch()
-                if (chr(key) == 'q' or key == 27) and not required:
-                    return ""
-                if key in(curses.KEY_ENTER, 10, 13) and int(default) >= 0:
-                    return choices[int(default)-1]
-                selected_number = int(chr(key))
-            except ValueError:
-                selected_number = -1
+        while selected_number not in valid_numbers:
+            key = self.win.getch()
+            if key == curses.KEY_RESIZE:
+                self._on_resize()
+                curses.doupdate()
+                continue
+            if (key == 113 or key == 27) and not required: # q or escape
+                return ""
+            if key in (curses.KEY_ENTER, 10, 13) and default_number >= 0:
+                return choices[default_number-1]
+            selected_number = key - 48 if 48 <= key <= 57 else -1 # digit keys
         return choices[selected_number-1]
 
     def get_input(self, message: str, default: str="", bound: int=maxsize, required: bool=False, input_type: str="text") -> str:
             self.state = self.INPUT
-            mlen = self._draw_box(message, default=default, required=required)
-
-            input_pos = (1 * X_PAD) + mlen + X_PAD
-            bound = min(SCREEN_WIDTH - input_pos - (2 * X_PAD), bound)
+            self._draw_box(message, default=default, required=required)
 
             curses.noecho()
             curses.curs_set(1)
             self.win.keypad(True)
 
-            while True:
+            while True: # inputs fit the requested bound to the screen themselves, and refit it on resize
+                input_pos = (1 * X_PAD) + self._box_mlen + X_PAD # a resize in the last attempt may have redrawn the box
                 if input_type == "text":
                     ti = self.TextInput(self, default, input_pos, bound)
                     finput = ti.get_input()
@@ -172,20 +349,28 @@ class CommandWindow:
 
             self.history_file_name: str = f"{DATA_DIR}{history_file_name}"
             self.history: List[str] = self._read_history_file()
-            self.history_matches: List[List[str]] = []
-            self.extended_matches: List[List[str]] = []
+            self._history_tail: Optional[str] = self.history[-1] if self.history else None # last line in the file
+            self.history_fd: int = parent._history_fd(self.history_file_name)
+            self.history_matches: List[str] = []
+            self.extended_matches: Deque[str] = deque()
             self.matches: List[str] = []
             self.match_index: int = -1
             self.autocomplete_buffer: str = ""
+            self._last_prefix: Optional[str] = None # prefix self.matches was last filtered for
+            self._prev_prefix: Optional[str] = None # prefix of the last filter pass over the current pool
+            self._prev_matches: List[str] = []      # what that pass kept, narrowed again while the prefix only grows
 
             self.default: str = default
             self.input_pos: int = input_pos
-            self.bound: int = bound
+            self.requested_bound: int = bound     # what the caller asked for, the field is refit to it on resize
+            self.bound: int = self._fit_bound()
+            self._nav_indices: List[int] = self._fitting_history_indices() # history entries up/down can land on
 
-            self.text_buffer: List[str] = []        # text the user has typed 
+            self.text_buffer: _GapBuffer = _GapBuffer()          # text the user has typed 
             self.cursor_pos: int = 0                               # index in text_buffer, for insertion
             self.hist_ptr: int = len(self.history)       # where are we in history?
-            self.saved_text_buffer: List[str] = []  # temp space for saved but not visible text buffer
+            self.saved_text_buffer: str = ""                    # snapshot of the typed text while browsing history
+            self._last_drawn: Optional[Tuple[str, int, Tuple[int, int]]] = None # (text, attr, ghost span) on screen
 
             self._draw_text_buffer()
 
@@ -194,36 +379,81 @@ class CommandWindow:
             self.win.keypad(True)
 
         def _get_active_buffer_string(self) -> str:
-            return "".join(self.history[self.hist_ptr]) if self.hist_ptr < len(self.history) else "".join(self.text_buffer)
+            return self.history[self.hist_ptr] if self.hist_ptr < len(self.history) else str(self.text_buffer)
 
 
         def _draw_text_buffer(self) -> int:
-            self.win.addstr(Y_PAD, self.input_pos, '_' * self.bound)
-            self.win.addstr(Y_PAD, self.input_pos, self._get_active_buffer_string())
-            if self.autocomplete_buffer:
-                self.win.addstr(Y_PAD, self.input_pos + self.cursor_pos, self.autocomplete_buffer[self.cursor_pos:], DARK_GREY)
-            self.win.move(Y_PAD, self.input_pos + self.cursor_pos)
-            self.win.refresh()
+            self._draw_field(self._get_active_buffer_string(), curses.A_NORMAL)
             return len(self.text_buffer)
+
+        def _draw_field(self, text: str, attr: int) -> None: # repaint only the cells that changed since the last draw
+            if self.bound <= 0: # the screen is too narrow for the field
+                return
+            ghost = self.autocomplete_buffer[self.cursor_pos:]
+            ghost_span = (self.cursor_pos, self.cursor_pos + len(ghost))
+            ghost_start, ghost_end = ghost_span
+            if ghost: # the cursor can sit past the text, keep the blanks in between
+                shown = f"{text[:ghost_start]}{self.parent._underscores[:max(0, ghost_start - len(text))]}{ghost}{text[ghost_end:]}"
+            else:
+                shown = text
+            # before the first draw, pretend a blank field in an unknown color is on screen
+            last_shown, last_attr, last_ghost_span = self._last_drawn or (self.parent._underscores[:self.bound], None, (0, 0))
+
+            if attr != last_attr:
+                lo, hi = 0, max(len(shown), len(last_shown))
+            else:
+                lo = _common_prefix_len(shown, last_shown)
+                if len(shown) != len(last_shown):
+                    hi = max(len(shown), len(last_shown))
+                else:
+                    hi = max(lo, len(shown) - _common_prefix_len(shown[::-1], last_shown[::-1]))
+                if ghost_span != last_ghost_span:
+                    spans = [span for span in (ghost_span, last_ghost_span) if span[0] < span[1]]
+                    lo = min([lo] + [span[0] for span in spans])
+                    hi = max([hi] + [span[1] for span in spans])
+
+            text_end = min(hi, len(shown))
+            for start, end, cell_attr in ((lo, min(text_end, ghost_start), attr), (max(lo, ghost_start), min(text_end, ghost_end), GHOST_COLOR), (max(lo, ghost_end), text_end, attr)):
+                if start < end:
+                    self.win.addstr(Y_PAD, self.input_pos + start, shown[start:end], cell_attr)
+            if hi > len(shown): # blank out what the old, longer string left behind, the field ends at bound
+                start = max(lo, len(shown))
+                if start < self.bound:
+                    self.win.addstr(Y_PAD, self.input_pos + start, self.parent._underscores[:min(hi, self.bound) - start])
+                if hi > self.bound:
+                    start = max(start, self.bound)
+                    self.win.addstr(Y_PAD, self.input_pos + start, ' ' * (hi - start))
+
+            self._last_drawn = (shown, attr, ghost_span)
+            self.win.move(Y_PAD, self.input_pos + self.cursor_pos)
+            self.win.noutrefresh()
         
 
         def _read_history_file(self) -> List[str]:
-            history = []
             os.makedirs(DATA_DIR, exist_ok=True)
 
-            if os.path.exists(self.history_file_name):
-                with open(self.history_file_name, 'r') as file:
-                    lines = file.readlines()
-                    for line in lines:
-                        history.append(line.strip('\n'))
+            try:
+                with open(self.history_file_name, 'rb') as file:
+                    history = file.read().decode(errors='replace').split('\n')
+            except FileNotFoundError:
+                return []
+            if history[-1] == "": # trailing newline
+                history.pop()
             return history
 
         def _add_history_line(self, line: str) -> None:
-            with open(self.history_file_name, 'a') as file:
-                file.write(f"{line}\n")
+            if line == self._history_tail: # repeating the last entry adds nothing
+                return
+            os.write(self.history_fd, f"{line}\n".encode())
+            self._history_tail = line
+            if self.hist_ptr == len(self.history): # stay on the typed text
+                self.hist_ptr += 1
+            if len(line) <= self.bound:
+                self._nav_indices.append(len(self.history))
+            self.history.append(line)
 
         def save(self) -> None:
-            self._add_history_line("".join(self.text_buffer))
+            self._add_history_line(str(self.text_buffer))
 
         def escape(self) -> None:
             self.text_buffer.clear()
@@ -241,29 +471,23 @@ class CommandWindow:
 
         def up(self) -> None:
             if not self.saved_text_buffer: # existence means we have saved text
-                self.saved_text_buffer = deepcopy(self.text_buffer)
-            if self.hist_ptr > 0 and len(self.history[self.hist_ptr-1]) <= self.bound:
-                self.hist_ptr -= 1
+                self.saved_text_buffer = str(self.text_buffer)
+            nav_pos = bisect_left(self._nav_indices, self.hist_ptr) # closest older entry that fits in bound
+            if nav_pos > 0:
+                self.hist_ptr = self._nav_indices[nav_pos - 1]
                 self.cursor_pos = len(self._get_active_buffer_string())
-            else:
-                if self.hist_ptr > 0:
-                    self.hist_ptr -= 1
-                    self.up()
-                else:
-                    self.hist_ptr -= 1
 
         def down(self) -> None:
-            if self.hist_ptr < len(self.history) - 1 and len(self.history[self.hist_ptr+1]) <= self.bound:
-                self.hist_ptr += 1
-            else:
-                self.hist_ptr += 1
-                if self.hist_ptr < len(self.history) - 1:
-                    self.down()
+            nav_pos = bisect_right(self._nav_indices, self.hist_ptr) # closest newer entry that fits, else back to the typed text
+            self.hist_ptr = self._nav_indices[nav_pos] if nav_pos < len(self._nav_indices) else len(self.history)
             if self.saved_text_buffer and self.hist_ptr == len(self.history):
-                self.text_buffer = deepcopy(self.saved_text_buffer)
-                self.saved_text_buffer.clear()
+                self.text_buffer.load(self.saved_text_buffer)
+                self.saved_text_buffer = ""
             self.cursor_pos = len(self._get_active_buffer_string())
 
+        def _fitting_history_indices(self) -> List[int]:
+            return [index for index, hist_entry in enumerate(self.history) if len(hist_entry) <= self.bound]
+
         def left(self) -> None:
             self.cursor_pos -= 1
 
@@ -273,9 +497,9 @@ class CommandWindow:
             else:
                 self.cursor_pos += 1
 
-        def _load_history_matches(self) -> None:
-            self.history_matches = [list(hist_entry) for hist_entry in self.history if hist_entry.startswith(self._get_active_buffer_string()) and len(hist_entry) <= self.bound]
-            self.history_matches = self.history_matches[::-1] # most recent first
+        def _load_history_matches(self) -> None: # everything that fits, _filter_autocomplete narrows it by prefix
+            self._pool_changed()
+            self.history_matches = [hist_entry for hist_entry in reversed(self.history) if len(hist_entry) <= self.bound] # most recent first
 
         def _next_history_match(self) -> None:
             if self.matches:
@@ -283,57 +507,63 @@ class CommandWindow:
                 self.autocomplete_buffer = self.matches[self.match_index]
 
         def _prev_history_match(self) -> None:
-            if self.history_matches:
-                self.match_index = (self.match_index - 1) % len(self.history_matches)
-                self._pull_history_to_current()
-                self.matches = self.history_matches[self.match_index][len(self.text_buffer):]
+            if self.matches:
+                self.match_index = (self.match_index - 1) % len(self.matches)
+                self.autocomplete_buffer = self.matches[self.match_index]
 
         def _accept_history_match(self) -> None:
-            self.text_buffer.extend(list(self.autocomplete_buffer[self.cursor_pos:]))
+            self.text_buffer.extend(self.autocomplete_buffer[self.cursor_pos:])
             self.cursor_pos = len(self.text_buffer)
 
         def _clear_history_matches(self) -> None:
+            self._pool_changed()
             self.match_index = -1
             self.matches.clear()
             self.history_matches.clear()
 
         def _clear_matches(self) -> None:
+            self._last_prefix = None
             self.autocomplete_buffer = ""
             self.matches.clear()
             self.match_index = -1
 
         def is_partial_match(self, partial_string: str) -> bool:
-            log.info(f"matches : {self.matches}")
+            if _TRACE:
+                log.info("matches : %d, first: %.32r", len(self.matches), self.matches[:1])
             for match in self.matches:
                 if match.startswith(partial_string):
                     return True
             return False
 
+        def _pool_changed(self) -> None: # history_matches or extended_matches changed, cached filter results are stale
+            self._last_prefix = self._prev_prefix = None
+
         def _filter_autocomplete(self) -> None:
-            possible_matches = []
-            if self.history_matches:
-                possible_matches.extend(self.history_matches)
-            if self.extended_matches:
-                possible_matches.extend(self.extended_matches)
-            for possible_match in possible_matches:
-                possible_match_string = "".join(possible_match)
-                if possible_match_string.startswith(self._get_active_buffer_string()):
-                    self.matches.append(possible_match_string)
+            prefix = self._get_active_buffer_string()
+            if self._prev_prefix is not None and prefix.startswith(self._prev_prefix):
+                possible_matches: Iterable[str] = self._prev_matches # prefix only grew, so matches can only narrow
+            else:
+                possible_matches = chain(self.history_matches, self.extended_matches)
+            self._prev_prefix = prefix
+            self._prev_matches = [possible_match for possible_match in possible_matches if possible_match.startswith(prefix)]
+            self.matches = self._prev_matches[:] # own copy, _clear_matches empties it in place
 
 
-        def extend_autocomplete_pool(self, additions: List[str]) -> None:
+        def extend_autocomplete_pool(self, additions: Sequence[str]) -> None:
             # if self.history_matches:
-            for addition in additions[::-1]:
-                # log.info(addition)
-                if addition.startswith(self._get_active_buffer_string()):
-                    self.extended_matches.insert(0, list(addition))
-                    # self.history_matches.insert(0, list(addition))
+            prefix = self._get_active_buffer_string()
+            fitting = [addition for addition in reversed(additions) if addition.startswith(prefix)]
+            if fitting:
+                self._pool_changed()
+                self.extended_matches.extendleft(fitting) # prepends in reverse, so additions keep their order
 
         def delete_from_autocomplete_pool(self, addition: str) -> None:
-            if list(addition) in self.extended_matches:
-                self.extended_matches.remove(list(addition))
+            if addition in self.extended_matches:
+                self._pool_changed()
+                self.extended_matches.remove(addition)
 
         def clear_extended_autocomplete_pool(self) -> None:
+            self._pool_changed()
             self.extended_matches.clear()
             # if list(addition) in self.history_matches:
                 # self.history_matches.remove(list(addition))
@@ -346,8 +576,14 @@ class CommandWindow:
         def history_autocomplete(self, changed: bool=False, direction: int=1) -> None:
             if self.history_matches:
                 if changed:
-                    self._clear_matches()
-                    self._filter_autocomplete()
+                    prefix = self._get_active_buffer_string()
+                    if prefix == self._last_prefix: # same prefix and pool, matches are still current
+                        self.autocomplete_buffer = ""
+                        self.match_index = -1
+                    else:
+                        self._clear_matches()
+                        self._filter_autocomplete()
+                        self._last_prefix = prefix
                 # log.info(f"autocomplete buffer before : {self.autocomplete_buffer}")
                 # log.info(f"match buffer : {self.matches}")
                 self._next_history_match() if direction == 1 else self._prev_history_match()
@@ -355,76 +591,185 @@ class CommandWindow:
 
         def _pull_history_to_current(self) -> None: # say "this is our new text buffer"
             if self.hist_ptr < len(self.history): # if we are in history
-                self.saved_text_buffer.clear() # clear because we are now editting
-                self.text_buffer = deepcopy(list(self.history[self.hist_ptr])) # text_buffer = current line in hist
+                self.saved_text_buffer = "" # clear because we are now editting
+                self.text_buffer.load(self.history[self.hist_ptr]) # text_buffer = current line in hist
                 self.hist_ptr = len(self.history)
 
 
+        def _on_enter(self) -> Optional[object]:
+            if self.hist_ptr != len(self.history) and self.saved_text_buffer: # we were not at a good location
+                self.hist_ptr = len(self.history)  # go to end of history (saved buffer)
+                self.cursor_pos = min(len(self.saved_text_buffer), self.bound)
+                return None
+            # there was no saved buffer, so let's send selected buff string
+            self._pull_history_to_current() # load selected buff into sendable position
+            self.hist_ptr = len(self.history)  # go to end of history (saved buffer)
+            return _SUBMIT
+
+        def _on_escape(self) -> Optional[object]:
+            if self.matches:
+                self._clear_matches()
+            elif self.hist_ptr != len(self.history): # we were not at a good location
+                self.hist_ptr = len(self.history)  # hit end of history (saved buffer)
+                self.cursor_pos = 0
+            else:
+                return _CANCEL
+            return None
+
+        def _on_backspace(self) -> Optional[object]:
+            if self.cursor_pos <= 0:
+                return _NOOP
+            self.backspace()
+            self.history_autocomplete(changed=True)
+            return None
+
+        def _on_delete(self) -> Optional[object]:
+            if self.cursor_pos >= len(self._get_active_buffer_string()):
+                return _NOOP
+            self.delete()
+            return None
+
+        def _on_up(self) -> Optional[object]:
+            if self.hist_ptr <= 0:
+                return _NOOP
+            self.up()
+            return None
+
+        def _on_down(self) -> Optional[object]:
+            if self.hist_ptr >= len(self.history):
+                return _NOOP
+            self.down()
+            return None
+
+        def _on_left(self) -> Optional[object]:
+            if self.cursor_pos <= 0:
+                return _NOOP
+            self.left()
+            return None
+
+        def _on_right(self) -> Optional[object]:
+            if not ((self.cursor_pos < self.bound and self.cursor_pos < len(self._get_active_buffer_string())) or self.matches):
+                return _NOOP
+            self.right()
+            return None
+
+        def _on_home(self) -> Optional[object]:
+            if self.cursor_pos == 0:
+                return _NOOP
+            self.cursor_pos = 0
+            return None
+
+        def _on_end(self) -> Optional[object]:
+            end = min(len(self._get_active_buffer_string()), self.bound)
+            if self.cursor_pos == end:
+                return _NOOP
+            self.cursor_pos = end
+            return None
+
+        def _on_tab(self) -> Optional[object]:
+            if not self.history_matches: # nothing to cycle through
+                return _NOOP
+            self.history_autocomplete(direction=1)
+            return None
+
+        def _on_btab(self) -> Optional[object]:
+            if not self.history_matches:
+                return _NOOP
+            self.history_autocomplete(direction=-1)
+            return None
+
+        def _fit_bound(self) -> int: # the requested bound, cut down to what the screen has room for
+            return min(self.requested_bound, self.parent._screen_w - self.input_pos - (2 * X_PAD))
+
+        def _fit_text(self) -> None: # cut the typed text, its snapshot and the cursor down after the field shrank
+            if len(self.text_buffer) > self.bound:
+                self.text_buffer.load(str(self.text_buffer)[:self.bound])
+            self.saved_text_buffer = self.saved_text_buffer[:self.bound]
+            if self.hist_ptr < len(self.history) and len(self.history[self.hist_ptr]) > self.bound:
+                self.hist_ptr = len(self.history) # the entry on screen no longer fits, back to the typed text like down()
+                if self.saved_text_buffer:
+                    self.text_buffer.load(self.saved_text_buffer)
+                    self.saved_text_buffer = ""
+                self.cursor_pos = len(self.text_buffer)
+            self.cursor_pos = min(self.cursor_pos, self.bound)
+
+        def _on_resize(self) -> None:
+            self.parent._on_resize()
+            self.bound = self._fit_bound() # can grow back as well as shrink
+            self._nav_indices = self._fitting_history_indices()
+            if self.bound > 0: # with no room at all nothing is drawn, keep the text whole until the terminal grows
+                self._fit_text()
+            had_matches = bool(self.matches)
+            self._clear_matches()
+            self._load_history_matches()
+            if had_matches: # the old ghost may no longer fit, pick again from what does
+                self.history_autocomplete(changed=True)
+            self._last_drawn = None # the box was rebuilt, repaint the whole field
+
+        def _on_char(self, key: int) -> Optional[object]: # regular character to print
+            if key < 32 or key == 127 or key > 255: # control characters and unhandled curses keys (F1, PgUp, ...) are not text
+                return _NOOP
+            self._pull_history_to_current()
+            if self.cursor_pos < self.bound:
+                self.text_buffer.insert(self.cursor_pos, _CHR[key] if key < 128 else chr(key))
+                self.cursor_pos += 1
+            self.history_autocomplete(changed=True)
+            return None
+
+        # keys still handled while the screen is too narrow to show the field
+        NARROW_KEYS = frozenset((10, 13, 27, curses.KEY_RESIZE))
+
+        # special keys, anything not in here is typed into the buffer
+        KEY_HANDLERS = {
+            10:                 _on_enter,
+            13:                 _on_enter,
+            27:                 _on_escape,
+            curses.KEY_BACKSPACE: _on_backspace,
+            curses.KEY_DC:      _on_delete,
+            curses.KEY_UP:      _on_up,
+            curses.KEY_DOWN:    _on_down,
+            curses.KEY_LEFT:    _on_left,
+            curses.KEY_RIGHT:   _on_right,
+            curses.KEY_HOME:    _on_home,
+            curses.KEY_END:     _on_end,
+            9:                  _on_tab,
+            curses.KEY_BTAB:    _on_btab,
+            curses.KEY_RESIZE:  _on_resize,
+        }
+
         def get_input(self) -> str:
             curses.noecho()
             curses.curs_set(1)
             self.win.keypad(True)
 
             self.init_autocomplete()
-
-            while (key := self.win.getch()):
-                log.info(key)
+            curses.doupdate()
+
+            # bound once, the loop runs per keystroke
+            getch, doupdate, draw = self.win.getch, curses.doupdate, self._draw_text_buffer
+            get_handler, on_char = self.KEY_HANDLERS.get, self._on_char
+            while (key := getch()):
+                if _TRACE:
+                    log.info("key: %d", key)
                 if self.bound <= 0:
+                    if self.requested_bound <= 0: # the caller asked for no field at all
+                        return ""
+                    if key not in self.NARROW_KEYS: # no room to show the field, hold the text until the terminal grows
+                        continue
+
+                handler = get_handler(key)
+                outcome = handler(self) if handler is not None else on_char(key)
+                if outcome is _SUBMIT:
+                    break
+                if outcome is _CANCEL:
                     return ""
+                if outcome is _NOOP: # nothing changed, leave the screen alone
+                    continue
 
-                if key in (10, 13): # enter
-                    if self.hist_ptr != len(self.history) and self.saved_text_buffer: # we were not at a good location
-                        self.hist_ptr = len(self.history)  # go to end of history (saved buffer)
-                        self.cursor_pos = min(len(self.saved_text_buffer), self.bound)
-                    else: # there was no saved buffer, so let's send selected buff string
-                        self._pull_history_to_current() # load selected buff into sendable position
-                        self.hist_ptr = len(self.history)  # go to end of history (saved buffer)
-                        break
-                elif key == 27: # escape
-                    if self.matches:
-                        self._clear_matches()
-                    elif self.hist_ptr != len(self.history): # we were not at a good location
-                        self.hist_ptr = len(self.history)  # hit end of history (saved buffer)
-                        self.cursor_pos = 0
-                    else:
-                        return ""
-                elif key == curses.KEY_BACKSPACE:
-                    if self.cursor_pos > 0:
-                        self.backspace()
-                        self.history_autocomplete(changed=True)
-                elif key == curses.KEY_DC:
-                    if self.cursor_pos < len(self._get_active_buffer_string()):
-                        self.delete()
-                elif key == curses.KEY_UP:
-                    if self.hist_ptr > 0:
-                        self.up()
-                elif key == curses.KEY_DOWN:
-                    if self.hist_ptr < len(self.history):
-                        self.down()
-                elif key == curses.KEY_LEFT:
-                    if self.cursor_pos > 0:
-                        self.left()
-                elif key == curses.KEY_RIGHT:
-                    if (self.cursor_pos < self.bound and self.cursor_pos < len(self._get_active_buffer_string())) or self.matches:
-                        self.right()
-                elif key == curses.KEY_HOME:
-                    self.cursor_pos = 0
-                elif key == curses.KEY_END:
-                    self.cursor_pos = min(len(self._get_active_buffer_string()), self.bound)
-                elif key == 9: # tab
-                    self.history_autocomplete(direction=1)
-                elif key == curses.KEY_BTAB:
-                    self.history_autocomplete(direction=-1)
-                else: # regular character to print
-                    self._pull_history_to_current()
-                    if self.cursor_pos < self.bound:
-                        self.text_buffer.insert(self.cursor_pos, chr(key))
-                        self.cursor_pos += 1
-                    self.history_autocomplete(changed=True)
-
-                self._draw_text_buffer()
-
-            finput = "".join(self.text_buffer)
+                draw()
+                doupdate()
+
+            finput = str(self.text_buffer)
 
             curses.curs_set(0)
             curses.noecho()
@@ -441,6 +786,9 @@ class CommandWindow:
 
     class PathInput(Input):
         def __init__(self, parent: "CommandWindow", default: str, input_pos: int, bound: int):
+            # set before Input.__init__, which draws the field and so validates
+            self._last_validated_prefix: Optional[str] = None # buffer text the cached color was computed for
+            self._last_validated_color: int = RED
             super().__init__(parent, default, input_pos, bound, "path_history")
             self._clean_path_history()
 
@@ -454,35 +802,45 @@ class CommandWindow:
                 for line in new_content:
                     # log.info(f"adding: {line}")
                     file.write(line)
+            self._history_tail = new_content[-1].rstrip("\n") if new_content else None # self.history may still hold removed paths
 
 
+        def _clear_matches(self) -> None:
+            super()._clear_matches()
+            self._last_validated_prefix = None # a partial match is judged against self.matches
+
         def validate_path(self) -> int:
+            active = self._get_active_buffer_string()
+            if active == self._last_validated_prefix: # cursor moves and redraws, nothing to recheck
+                return self._last_validated_color
+            color = self._path_color(active)
+            self._last_validated_prefix, self._last_validated_color = active, color
+            return color
+
+        def _path_color(self, active: str) -> int:
             self._clean_path_history()
-            if self._get_active_buffer_string():
-                expanded = os.path.expanduser(self._get_active_buffer_string())
+            if active:
+                expanded = os.path.expanduser(active)
             else:
                 return RED
             path_obj = Path(expanded)
-            log.info(self.extended_matches)
+            if _TRACE:
+                log.info("extended matches: %d", len(self.extended_matches))
 
             if path_obj.exists():
                 self.clear_extended_autocomplete_pool()
                 if path_obj.is_dir():
-                    self.extend_autocomplete_pool([str(path_obj.absolute() / file.name)for file in path_obj.iterdir()])
+                    self.extend_autocomplete_pool(_listdir(str(path_obj.absolute())))
                 return GREEN
-            elif self.is_partial_match(self._get_active_buffer_string()):
-                log.info(self._get_active_buffer_string())
+            elif self.is_partial_match(active):
+                if _TRACE:
+                    log.info("partial match: %.32s", active)
                 # self.clear_extended_autocomplete_pool()
-                self.extend_autocomplete_pool([str(path_obj.absolute() / file.name) for file in path_obj.parent.iterdir()])
+                self.extend_autocomplete_pool(_listdir(str(path_obj.absolute().parent)))
                 return BRIGHT_YELLOW
             else:
                 return RED
 
         def _draw_text_buffer(self) -> int:
-            self.win.addstr(Y_PAD, self.input_pos, '_' * self.bound)
-            self.win.addstr(Y_PAD, self.input_pos, self._get_active_buffer_string(), self.validate_path())
-            if self.autocomplete_buffer:
-                self.win.addstr(Y_PAD, self.input_pos + self.cursor_pos, self.autocomplete_buffer[self.cursor_pos:], DARK_GREY)
-            self.win.move(Y_PAD, self.input_pos + self.cursor_pos)
-            self.win.refresh()
+            self._draw_field(self._get_active_buffer_string(), self.validate_path())
             return len(self.text_buffer)